@@ -13,6 +13,9 @@ class CONSTANTS:
     NUM_TRIGGER = 2
     NUM_BUTTONS = 8  # this number is including the triggers
 
+    # bytes in one full message, start message + axes + 4 buttons per byte
+    MESSAGE_SIZE = 1 + NUM_USED_AXES + NUM_BUTTONS // 4
+
     class INPUT_TYPE:
         # enum for input type
         IS_BUTTON = 0
@@ -37,7 +40,7 @@ class CONSTANTS:
 
     class BUTTONS:
         SIZE_BUTTON_IN_BITS = 2
-        NUM_BUTTONS_PER_BYTE = 8 / SIZE_BUTTON_IN_BITS
+        NUM_BUTTONS_PER_BYTE = 8 // SIZE_BUTTON_IN_BITS
 
         # I choose 2 to represent ON b/c it equals the bit value of 10
         # this means if it error and one of the bit was flipped then it would ignore it.
@@ -1,3 +1,5 @@
+import argparse
+import logging
 import math
 
 from digi.xbee.devices import XBeeDevice
@@ -11,6 +13,12 @@ XBEE_SPEED = 921600
 XBEE_UPDATE_RATE = 40000000  # 40000 nano second -> 40 micro second
 XBEE_TIMEOUT = 1000000000  # 1,000,000 nano second -> 1 second
 
+logger = logging.getLogger(__name__)
+
+# the start message and message size as plain ints, checked for every message
+START_BYTE = CONSTANTS.START_MESSAGE[0]
+MESSAGE_SIZE = CONSTANTS.MESSAGE_SIZE
+
 
 class Xbee():
     def __init__(self):
@@ -32,8 +40,8 @@ class Xbee():
         self.__xbee_device = XBeeDevice(XBEE_PORT, XBEE_SPEED)
         self.__xbee_device.open()
 
-        # track when the last successful message was received
-        self.__last_successful_message = time.time_ns()
+        # time the xbee is disabled by if no successful message arrives before it
+        self.__signal_deadline = time.monotonic_ns() + XBEE_TIMEOUT
     """
     have the device port be closed
     """
@@ -103,12 +111,11 @@ class Xbee():
     """
     helper function that is called when message is received, to parse to get values
     
-    :param message - a full message that start with start message
+    :param message - the received data holding the message
+    :param byte_num - index of the first byte after the message's start message
     """
     #
-    def __parse_incoming_message(self, message: list[int]):
-        # the current byte number
-        byte_num: int = 0
+    def __parse_incoming_message(self, message: bytearray, byte_num: int):
 
         # parse for axis
         for i in range(0, CONSTANTS.NUM_USED_AXES, 1):
@@ -122,8 +129,8 @@ class Xbee():
                 byte_num = byte_num + 1
 
             # check if section of byte is on or off
-            print(message[byte_num])
-            self.__button_values[i] = ((message[byte_num]//pow(2, (i % CONSTANTS.BUTTONS.NUM_BUTTONS_PER_BYTE)*CONSTANTS.BUTTONS.SIZE_BUTTON_IN_BITS)) % 4) == CONSTANTS.BUTTONS.ON
+            logger.debug("button byte %d", message[byte_num])
+            self.__button_values[i] = ((message[byte_num] >> ((i % CONSTANTS.BUTTONS.NUM_BUTTONS_PER_BYTE)*CONSTANTS.BUTTONS.SIZE_BUTTON_IN_BITS)) & 3) == CONSTANTS.BUTTONS.ON
 
 
     def send_msg(self):
@@ -152,30 +159,50 @@ class Xbee():
         if(message is None):
             return
 
-        # check if message has a valid start message
-        if(list(message.data)[0] != int.from_bytes(CONSTANTS.START_MESSAGE)):
-            return
-        else:
+        # index straight into the received data instead of copying it
+        data = message.data
+
+        # the base station sends one message per packet, but parse every whole message in
+        # the packet in order so the last one sets the values
+        for start in range(0, len(data) - MESSAGE_SIZE + 1, MESSAGE_SIZE):
+            # check if message has a valid start message
+            if(data[start] != START_BYTE):
+                return
+
             if (not self.__is_first_connected):
                 self.__is_first_connected = True
 
-            self.__parse_incoming_message(list(message.data)[1:])
-            self.print_values()
-            self.__last_successful_message = time.time_ns()
+            self.__parse_incoming_message(data, start + 1)
+            if (logger.isEnabledFor(logging.DEBUG)):
+                self.print_values()
+            self.__signal_deadline = time.monotonic_ns() + XBEE_TIMEOUT
 
     def main(self):
 
-        last_cycle_time = time.time_ns()
+        next_cycle_time = time.monotonic_ns() + XBEE_UPDATE_RATE
 
         while(not self.__is_disabled):
-            if (time.time_ns() - last_cycle_time > XBEE_UPDATE_RATE):
-                last_cycle_time = time.time_ns()
-                self.on_message_received()
+            self.on_message_received()
+
+            # one clock read per cycle for both the timeout and the sleep,
+            # monotonic so a wall clock change can't trip or hide the timeout
+            now = time.monotonic_ns()
+            if(self.__is_first_connected and now > self.__signal_deadline):
+                self.disable_xbee()
 
-                if(time.time_ns() - self.__last_successful_message > XBEE_TIMEOUT and self.__is_first_connected):
-                    self.disable_xbee()
+            # sleep until the next cycle instead of spinning on the clock
+            remaining = next_cycle_time - now
+            if (remaining > 0):
+                time.sleep(remaining / 1e9)
+            # after a stall restart from now instead of running cycles back to back
+            next_cycle_time = max(next_cycle_time + XBEE_UPDATE_RATE, time.monotonic_ns())
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--verbose', action='store_true', help="log and print every received value")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
     xbee = Xbee()
     xbee.main()
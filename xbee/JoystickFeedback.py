@@ -1,6 +1,10 @@
+import logging
+
 import pygame
 from pygame.event import Event
 
+logger = logging.getLogger(__name__)
+
 
 class Display:
 
@@ -9,15 +13,20 @@ class Display:
         # Set the width and height of the screen (width, height), and name the window.
         self.screen = pygame.display.set_mode((500, 550))
         self.text_print = TextPrint(self.screen)
+        # connected joysticks by instance id
         self.joysticks = {}
-        self.axis = {}
         pygame.display.set_caption("Joystick Feedback")
         self.creep = False
         self.reverse = False
 
+        # set when something shown has changed since the last redraw
+        self.dirty = True
+
     def Update_Display2(self, creep, reverse):
-        self.creep = creep
-        self.reverse = reverse
+        if creep != self.creep or reverse != self.reverse:
+            self.creep = creep
+            self.reverse = reverse
+            self.dirty = True
 
     def Update_Display(self):
         # Drawing step
@@ -33,30 +42,26 @@ class Display:
         self.text_print.indent()
 
         # For each joystick:
-        for joystick in self.joysticks.values():
-            jid = joystick.get_instance_id()
+        for jid, state in self.joysticks.items():
+            joystick = state.joy
 
             self.text_print.tprint(f"Joystick {jid}")
             self.text_print.indent()
 
-            # Get the name from the OS for the controller/joystick.
-            name = joystick.get_name()
-            self.text_print.tprint(f"Joystick name: {name}")
-
-            guid = joystick.get_guid()
-            self.text_print.tprint(f"GUID: {guid}")
+            # The name from the OS for the controller/joystick, read when it connected.
+            self.text_print.tprint(f"Joystick name: {state.name}")
+            self.text_print.tprint(f"GUID: {state.guid}")
 
             power_level = joystick.get_power_level()
             self.text_print.tprint(f"Joystick's power level: {power_level}")
 
             # Usually axis run in pairs, up/down for one, and left/right for
             # the other. Triggers count as axes.
-            axes = joystick.get_numaxes()
+            axes = len(state.axis)
             self.text_print.tprint(f"Number of axes: {axes}")
             self.text_print.indent()
 
-            for i in range(axes):
-                axis = self.axis[0][i]
+            for i, axis in enumerate(state.axis):
                 self.text_print.tprint(f"Axis {i} value: {axis:>6.3f}")
             self.text_print.unindent()
 
@@ -86,6 +91,7 @@ class Display:
             self.text_print.tprint("ReverseMode: "+ str(self.reverse))
         # Go ahead and update the screen with what we've drawn.
         pygame.display.flip()
+        self.dirty = False
 
     def Controller_Display(self, newEvent: Event):
         # Used to manage how fast the screen updates.
@@ -105,36 +111,66 @@ class Display:
             # This event will be generated when the program starts for every
             # joystick, filling up the list without needing to create them manually.
             joy = pygame.joystick.Joystick(newEvent.device_index)
-            axis = dict()
-            for i in range(joy.get_numaxes()):
-                axis[i] = joy.get_axis(i)
-            self.joysticks[joy.get_instance_id()] = joy
-            self.axis[joy.get_instance_id()] = axis
-            print(f"Joystick {joy.get_instance_id()} connencted")
+            jid = joy.get_instance_id()
+            self.joysticks[jid] = JoystickState(joy)
+            self.dirty = True
+            logger.info("Joystick %d connected", jid)
 
         if newEvent.type == pygame.JOYDEVICEREMOVED:
             del self.joysticks[newEvent.instance_id]
-            del self.axis[newEvent.instance_id]
-            print(f"Joystick {newEvent.instance_id} disconnected")
+            self.dirty = True
+            logger.info("Joystick %d disconnected", newEvent.instance_id)
 
         if newEvent.type == pygame.JOYAXISMOTION:
-            self.axis[0][newEvent.dict['axis']] = newEvent.dict['value']
+            axis = self.joysticks[newEvent.instance_id].axis
+            if axis[newEvent.dict['axis']] != newEvent.dict['value']:
+                axis[newEvent.dict['axis']] = newEvent.dict['value']
+                self.dirty = True
+
+        # buttons and hats are read straight from the joystick when drawing
+        if newEvent.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION):
+            self.dirty = True
+
+    # redraw the screen if anything shown has changed, called at the display rate
+    # rather than per event so bursts of events only cost one redraw
+    def Refresh_Display(self):
+        if self.dirty:
+            self.Update_Display()
+
 
-        self.Update_Display()
+# everything shown for one connected joystick
+class JoystickState:
+    def __init__(self, joy):
+        self.joy = joy
+        # the name and guid don't change while it is connected
+        self.name = joy.get_name()
+        self.guid = joy.get_guid()
+        # last value of each axis, updated from motion events
+        self.axis = [joy.get_axis(i) for i in range(joy.get_numaxes())]
 
 
 class TextPrint:
     def __init__(self, screen):
+        # lines rendered on the last redraw and on this one, most lines are the
+        # same between redraws so only the ones that changed get rendered again
+        self.cache = {}
+        self.rendered = {}
         self.reset()
         self.font = pygame.font.Font(None, 25)
         self.screen = screen
 
     def tprint(self, text):
-        text_bitmap = self.font.render(text, True, (0, 0, 0))
+        text_bitmap = self.cache.get(text)
+        if text_bitmap is None:
+            text_bitmap = self.font.render(text, True, (0, 0, 0))
+        self.rendered[text] = text_bitmap
         self.screen.blit(text_bitmap, (self.x, self.y))
         self.y += self.line_height
 
     def reset(self):
+        # keep only the lines drawn last time so the cache can't grow
+        self.cache = self.rendered
+        self.rendered = {}
         self.x = 10
         self.y = 10
         self.line_height = 15
@@ -147,10 +183,22 @@ class TextPrint:
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     pygame.init()
+    # only queue the joystick events the display draws, everything else is dropped by SDL
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([
+        pygame.JOYDEVICEADDED,
+        pygame.JOYDEVICEREMOVED,
+        pygame.JOYAXISMOTION,
+        pygame.JOYBUTTONDOWN,
+        pygame.JOYBUTTONUP,
+        pygame.JOYHATMOTION,
+    ])
     display = Display()
     display.Update_Display()
     while(True):
         pygame.time.wait(33)
         for event in pygame.event.get():
             display.Controller_Display(event)
+        display.Refresh_Display()
@@ -1,15 +1,120 @@
-import serial
 import math
 import pygame
+import argparse
+import collections
+import logging
 import os
+import struct
+import threading
 import time
 from pygame.event import Event
 from CommandCodes import CONSTANTS
 from JoystickFeedback import Display
-from digi.xbee.devices import XBeeDevice, RemoteXBeeDevice, XBee64BitAddress
+
+logger = logging.getLogger(__name__)
+
+# joypad direction -> mode state to set, any other direction leaves the modes alone
+JOYPAD_MODES = {
+    CONSTANTS.JOYPAD.UP: True,
+    CONSTANTS.JOYPAD.DOWN: False,
+}
+
+# axes that are joysticks
+JOYSTICK_AXES = frozenset((
+    CONSTANTS.JOYSTICK.AXIS_LX,
+    CONSTANTS.JOYSTICK.AXIS_LY,
+    CONSTANTS.JOYSTICK.AXIS_RX,
+    CONSTANTS.JOYSTICK.AXIS_RY,
+))
+
+# axes that are triggers, any other axis has no value slot and is ignored
+TRIGGER_AXES = frozenset((
+    CONSTANTS.TRIGGER.AXIS_LT,
+    CONSTANTS.TRIGGER.AXIS_RT,
+))
+
+# joystick output range, bound once so the axis handler skips the attribute chains
+AXIS_NEUTRAL = CONSTANTS.JOYSTICK.NEUTRAL_INT
+AXIS_MIN = CONSTANTS.JOYSTICK.MIN_VALUE
+AXIS_MAX = CONSTANTS.JOYSTICK.MAX_VALUE
+
+# the only pygame events the base station handles
+EVENT_TYPES = [
+    pygame.QUIT,
+    pygame.JOYDEVICEADDED,
+    pygame.JOYDEVICEREMOVED,
+    pygame.JOYAXISMOTION,
+    pygame.JOYBUTTONDOWN,
+    pygame.JOYBUTTONUP,
+    pygame.JOYHATMOTION,
+]
+
+# outgoing message layout: start byte, left axis, right axis, 2 bytes of buttons,
+# sized from the constant the rover reads messages with so the two can't drift
+MESSAGE_STRUCT = struct.Struct('%dB' % CONSTANTS.MESSAGE_SIZE)
+START_BYTE = CONSTANTS.START_MESSAGE[0]
+
+# buttons are stored after the axes and triggers, at their id plus this offset
+BUTTON_OFFSET = CONSTANTS.NUM_AXES + CONSTANTS.NUM_TRIGGER
+SELECT_VALUE = CONSTANTS.BUTTONS.SELECT + BUTTON_OFFSET
+START_VALUE = CONSTANTS.BUTTONS.START + BUTTON_OFFSET
+
+# number of stored values, the axes and triggers then every button up to home
+NUM_VALUES = CONSTANTS.BUTTONS.HOME + BUTTON_OFFSET + 1
+
+# keys of the buttons packed into each button byte, in order from the top two bits down
+BUTTON_BYTE_1 = (
+    CONSTANTS.BUTTONS.A + BUTTON_OFFSET,
+    CONSTANTS.BUTTONS.B + BUTTON_OFFSET,
+    CONSTANTS.BUTTONS.X + BUTTON_OFFSET,
+    CONSTANTS.BUTTONS.Y + BUTTON_OFFSET,
+)
+BUTTON_BYTE_2 = (
+    CONSTANTS.BUTTONS.LEFT_BUMPER + BUTTON_OFFSET,
+    CONSTANTS.BUTTONS.RIGHT_BUMPER + BUTTON_OFFSET,
+    CONSTANTS.TRIGGER.AXIS_LT,
+    CONSTANTS.TRIGGER.AXIS_RT,
+)
+
+"""
+Drop axis events that are overwritten by a later event for the same axis,
+only the newest value is ever sent so the older ones are wasted work
+
+:param events - the events pulled from pygame since the last update
+"""
+
+def coalesce_axis_events(events: list[Event]) -> list[Event]:
+    kept = []
+    seen_axes = set()
+
+    # walk backwards so the last event for each axis is the one kept
+    for event in reversed(events):
+        if (event.type == pygame.JOYAXISMOTION):
+            key = (event.instance_id, event.axis)
+            if (key in seen_axes):
+                continue
+            seen_axes.add(key)
+        kept.append(event)
+
+    # put the events back in the order they happened
+    kept.reverse()
+    return kept
+
+"""
+Pack four 2 bit button values into one byte
+
+:param values - the stored controller values
+:param keys - the four buttons to pack, the first one goes in the top two bits
+"""
+
+def pack_buttons(values, keys) -> int:
+    return (values[keys[0]] << 6) | (values[keys[1]] << 4) | (values[keys[2]] << 2) | values[keys[3]]
 
 class XbeeControl:
-    def __init__(self):
+    def __init__(self, display: Display):
+        # the window showing the controller state
+        self.display = display
+
         # a set to hold multiple joysticks
         self.joysticks = {}
 
@@ -22,28 +127,23 @@ class XbeeControl:
         # flag to flip the drive control
         self.reverseMode = False
 
-        # initialize all of values
-        self.values = {
-            # Store all the axis
-            CONSTANTS.JOYSTICK.AXIS_LX: CONSTANTS.JOYSTICK.NEUTRAL_HEX,
-            CONSTANTS.JOYSTICK.AXIS_LY: CONSTANTS.JOYSTICK.NEUTRAL_HEX,
-            CONSTANTS.JOYSTICK.AXIS_RX: CONSTANTS.JOYSTICK.NEUTRAL_HEX,
-            CONSTANTS.JOYSTICK.AXIS_RY: CONSTANTS.JOYSTICK.NEUTRAL_HEX,
-
-            # Store all the buttons
-            CONSTANTS.TRIGGER.AXIS_LT: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.TRIGGER.AXIS_RT: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.A + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.B + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.X + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.Y + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.LEFT_BUMPER + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.RIGHT_BUMPER + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.START + 6: CONSTANTS.BUTTONS.OFF,
-            CONSTANTS.BUTTONS.SELECT + 6: CONSTANTS.BUTTONS.OFF}
+        # axis multiplier out of 100 and the axes sent as left and right,
+        # recomputed whenever a mode changes
+        self.multiplier = 100
+        self.leftAxis = CONSTANTS.JOYSTICK.AXIS_LY
+        self.rightAxis = CONSTANTS.JOYSTICK.AXIS_RY
+
+        # all of the values as one byte each, indexed by axis id
+        # with the buttons stored after the axes and triggers (button id + BUTTON_OFFSET)
+        self.values = bytearray([CONSTANTS.BUTTONS.OFF]) * NUM_VALUES
+        for axis in JOYSTICK_AXES:
+            self.values[axis] = CONSTANTS.JOYSTICK.NEUTRAL_INT
 
         self.XBEE_ENABLE = True
         if (self.XBEE_ENABLE):
+            # only pay for importing digi-xbee when the xbee is actually used
+            from digi.xbee.devices import XBeeDevice, RemoteXBeeDevice, XBee64BitAddress
+
             self.PORT = "COM11"  # change based on current xbee coms
             self.BAUD_RATE = 921600  # change based on xbee baud_rate
             self.xbee_device = XBeeDevice(self.PORT, self.BAUD_RATE)
@@ -53,10 +153,47 @@ class XbeeControl:
             # self.XbeeCom = serial.Serial(self.PORT,
             #                              self.BAUD_RATE)  # create the actual serial - will error if port doesn't exist
 
+            # messages are sent from their own thread so a slow serial write
+            # doesn't hold up reading the controller, every message is the whole
+            # controller state so only the newest one waits for the radio
+            self.txQueue = collections.deque(maxlen=1)
+            self.txReady = threading.Event()
+            self.txStopped = False
+            self.txThread = threading.Thread(target=self.TransmitLoop, daemon=True)
+            self.txThread.start()
+
         self.DEADBAND = 0.10  # this is the dead band on the controller
+        self.AXIS_THRESHOLD = 2  # axis changes smaller than this are stick noise
         self.FREQUENCY = 40000000  # how often the message is sent, (ns)
         self.updateLoop = 0
 
+        # the rover disables itself after a second without a message, so an
+        # unchanged message is still resent this often to keep it alive
+        self.KEEPALIVE = 250000000  # (ns)
+
+        # buffer the outgoing message is packed into, reused every update
+        self.message = bytearray(MESSAGE_STRUCT.size)
+
+        # last message sent and when it has to be sent again if nothing changes
+        self.lastMessage = b''
+        self.nextKeepalive = 0
+
+        # set when an event has been handled since the last message was built
+        self.valuesChanged = True
+
+        # handler for each event type, indexed directly by the event type
+        handlers = {
+            pygame.JOYDEVICEADDED: self.HotPluggin,
+            pygame.JOYDEVICEREMOVED: self.HotPluggin,
+            pygame.JOYAXISMOTION: self.SendAxis,
+            pygame.JOYBUTTONDOWN: self.SendButton,
+            pygame.JOYBUTTONUP: self.SendButton,
+            pygame.JOYHATMOTION: self.SendJoyPad,
+        }
+        self.handlers = [None] * (max(handlers) + 1)
+        for event_type, handler in handlers.items():
+            self.handlers[event_type] = handler
+
     """
     Update the values stored when an event is received from controller
     newEvent: the new event from the controller
@@ -67,28 +204,12 @@ class XbeeControl:
         # JOYAXISMOTION, JOYBALLMOTION, JOYBUTTONDOWN,
         # JOYBUTTONUP, JOYHATMOTION, JOYDEVICEADDED, JOYDEVICEREMOVED
 
-        match (newEvent.type):
-            # controller was added or removed
-            case pygame.JOYDEVICEADDED | pygame.JOYDEVICEREMOVED:
-                self.HotPluggin(newEvent)
-
-            # axis
-            case pygame.JOYAXISMOTION:
-                # Joystick Axis
-                if (newEvent.dict['axis'] < 4):
-                    self.SendJoystickAxis(newEvent)
-                # Trigger Axis
-                else:
-                    self.SendTriggerAxis(newEvent)
-
-            # button
-            case pygame.JOYBUTTONDOWN | pygame.JOYBUTTONUP:
-                self.SendButton(newEvent)
-
-            case pygame.JOYHATMOTION:
-                self.SendJoyPad(newEvent)
-                display.Update_Display2(creep=self.creepMode, reverse=self.reverseMode)
-        display.Controller_Display(newEvent)
+        if (newEvent.type < len(self.handlers)):
+            handler = self.handlers[newEvent.type]
+            if (handler is not None):
+                handler(newEvent)
+                self.valuesChanged = True
+        self.display.Controller_Display(newEvent)
 
     """
     Handle events when the controller is plugin or unpluged
@@ -102,15 +223,28 @@ class XbeeControl:
             # This event will be generated when the program starts for every
             # joystick, filling up the list without needing to create them manually.
             joy = pygame.joystick.Joystick(newEvent.device_index)
-            self.joysticks[joy.get_instance_id()] = joy
-            print(f"Joystick {joy.get_instance_id()} connencted")
+            jid = joy.get_instance_id()
+            self.joysticks[jid] = joy
+            logger.info("Joystick %d connected", jid)
 
         # A device is removed
         if newEvent.type == pygame.JOYDEVICEREMOVED:
             # remove the controller from the joystick list and kill the code
             self.quit = True
             del self.joysticks[newEvent.instance_id]
-            print(f"Joystick {newEvent.instance_id} disconnected")
+            logger.info("Joystick %d disconnected", newEvent.instance_id)
+
+    """
+    Handle axis events, joysticks and triggers are sent differently
+    """
+
+    def SendAxis(self, newEvent: Event):
+        # Joystick Axis
+        if (newEvent.dict['axis'] in JOYSTICK_AXES):
+            self.SendJoystickAxis(newEvent)
+        # Trigger Axis
+        elif (newEvent.dict['axis'] in TRIGGER_AXES):
+            self.SendTriggerAxis(newEvent)
 
     """
     Handle events when an joystick axis is pushed
@@ -118,28 +252,32 @@ class XbeeControl:
 
     def SendJoystickAxis(self, newEvent: Event):
         # multiplier out of 100 to scale the output
-        multiplier = 100
-        if (self.creepMode):
-            # half the speed of the controller
-            multiplier = 20
-        if (self.reverseMode):
-            # flip the direction of axis of the controller
-            multiplier = -multiplier
+        multiplier = self.multiplier
+        event = newEvent.dict
+        axis = event['axis']
 
         # check for deadband. If inside then zero values
-        if (abs(newEvent.dict['value']) < self.DEADBAND):
-            newEvent.dict['value'] = 0
+        if (-self.DEADBAND < event['value'] < self.DEADBAND):
+            event['value'] = 0
 
         # convert the controller to int with multiplier
-        newValue = math.floor(multiplier * newEvent.dict['value'] + CONSTANTS.JOYSTICK.NEUTRAL_INT)
+        newValue = math.floor(multiplier * event['value'] + AXIS_NEUTRAL)
 
         # check if value is between min and max
-        if (newValue < CONSTANTS.JOYSTICK.MIN_VALUE):
-            newValue = CONSTANTS.JOYSTICK.MIN_VALUE
-        elif (newValue > CONSTANTS.JOYSTICK.MAX_VALUE):
-            newValue = CONSTANTS.JOYSTICK.MAX_VALUE
+        if (newValue < AXIS_MIN):
+            newValue = AXIS_MIN
+        elif (newValue > AXIS_MAX):
+            newValue = AXIS_MAX
+
+        # drop jitter from a stick held still, neutral and the end stops are
+        # always stored so the axis can settle on them exactly
+        change = newValue - self.values[axis]
+        if (-self.AXIS_THRESHOLD < change < self.AXIS_THRESHOLD
+                and newValue != AXIS_NEUTRAL
+                and AXIS_MIN < newValue < AXIS_MAX):
+            return
 
-        self.values[newEvent.dict['axis']] = newValue.to_bytes(1)  # store the value as one byte
+        self.values[axis] = newValue
 
     """
     Handle events when an joystick axis is pushed
@@ -158,13 +296,16 @@ class XbeeControl:
     """
 
     def SendButton(self, newEvent: Event):
-        newValue = self.joysticks[newEvent.dict['joy']].get_button(newEvent.dict['button'])
-        if (newValue == 0):
-            # the button is off
-            self.values[newEvent.dict['button'] + 6] = CONSTANTS.BUTTONS.OFF
-        else:
-            # the button is on
-            self.values[newEvent.dict['button'] + 6] = CONSTANTS.BUTTONS.ON
+        # buttons past home aren't used so there's nowhere to store them
+        index = newEvent.dict['button'] + BUTTON_OFFSET
+        if (index < NUM_VALUES):
+            newValue = self.joysticks[newEvent.dict['joy']].get_button(newEvent.dict['button'])
+            if (newValue == 0):
+                # the button is off
+                self.values[index] = CONSTANTS.BUTTONS.OFF
+            else:
+                # the button is on
+                self.values[index] = CONSTANTS.BUTTONS.ON
 
         # if button is home kill the code
         if(newEvent.dict['button'] == CONSTANTS.BUTTONS.HOME):
@@ -177,24 +318,45 @@ class XbeeControl:
 
     def SendJoyPad(self, newEvent: Event):
 
-        # if joypad is down disable modes
-        if (newEvent.dict['value'] == CONSTANTS.JOYPAD.DOWN):
-            if (self.values[CONSTANTS.BUTTONS.SELECT + 6] == CONSTANTS.BUTTONS.ON):  # left button is on
-                self.reverseMode = False
-                print("reverse off")
-            if (self.values[CONSTANTS.BUTTONS.START + 6] == CONSTANTS.BUTTONS.ON):  # right button is on
-                self.creepMode = False
-                print("creep mode off")
-
-        # if joypad is up enable modes
-        elif (newEvent.dict['value'] == CONSTANTS.JOYPAD.UP):
-            if (self.values[CONSTANTS.BUTTONS.SELECT + 6] == CONSTANTS.BUTTONS.ON):  # left button is on
-                self.reverseMode = True
-                print("reverse on")
-
-            if (self.values[CONSTANTS.BUTTONS.START + 6] == CONSTANTS.BUTTONS.ON):  # right button is on
-                self.creepMode = True
-                print("creep mode on")
+        # joypad up enables modes, joypad down disables them
+        enable = JOYPAD_MODES.get(newEvent.dict['value'])
+        if (enable is None):
+            return
+
+        state = "on" if enable else "off"
+        if (self.values[SELECT_VALUE] == CONSTANTS.BUTTONS.ON):  # left button is on
+            self.reverseMode = enable
+            logger.info("reverse %s", state)
+
+        if (self.values[START_VALUE] == CONSTANTS.BUTTONS.ON):  # right button is on
+            self.creepMode = enable
+            logger.info("creep mode %s", state)
+
+        self.UpdateModes()
+        self.display.Update_Display2(creep=self.creepMode, reverse=self.reverseMode)
+
+    """
+    Recompute everything that depends on the creep and reverse modes
+    """
+
+    def UpdateModes(self):
+        multiplier = 100
+        if (self.creepMode):
+            # half the speed of the controller
+            multiplier = 20
+        if (self.reverseMode):
+            # flip the direction of axis of the controller
+            multiplier = -multiplier
+        self.multiplier = multiplier
+
+        if (not self.reverseMode):
+            # send the regular mode so Left joy stick is left and right joy stick is right
+            self.leftAxis = CONSTANTS.JOYSTICK.AXIS_LY
+            self.rightAxis = CONSTANTS.JOYSTICK.AXIS_RY
+        else:
+            # invert the controller so left joy stick is right and right joy stick is left
+            self.leftAxis = CONSTANTS.JOYSTICK.AXIS_RY
+            self.rightAxis = CONSTANTS.JOYSTICK.AXIS_LY
 
     """
     Send the current values to the controller
@@ -206,78 +368,145 @@ class XbeeControl:
         # if the xbee is enabled
         if (self.XBEE_ENABLE):
 
-            data = [int.from_bytes(CONSTANTS.START_MESSAGE)]
+            # don't rebuild the message if no input came in and no keepalive is due
+            now = time.monotonic_ns()
+            if (not self.valuesChanged and now < self.nextKeepalive):
+                return
+            self.valuesChanged = False
+
+            # send 4 buttons in each byte
+            buttons_1 = pack_buttons(self.values, BUTTON_BYTE_1)
+            buttons_2 = pack_buttons(self.values, BUTTON_BYTE_2)
+
+            # pack the whole message into the reused buffer in one call
+            MESSAGE_STRUCT.pack_into(self.message, 0,
+                                     START_BYTE,
+                                     self.values[self.leftAxis],
+                                     self.values[self.rightAxis],
+                                     buttons_1,
+                                     buttons_2)
+
+            # skip the send if nothing changed and the rover isn't due a keepalive
+            if (self.message == self.lastMessage and now < self.nextKeepalive):
+                return
+            self.lastMessage = bytes(self.message)
+            self.nextKeepalive = now + self.KEEPALIVE
+
+            self.txQueue.append(self.lastMessage)
+            self.txReady.set()
 
-            # write the initial
-            #self.XbeeCom.write(CONSTANTS.START_MESSAGE)
+    """
+    Send queued messages to the rover, runs on its own thread until StopTransmit
+    """
 
-            if (not self.reverseMode):
-                # send the regular mode so Left joy stick is left and right joy stick is right
-                data.append(int.from_bytes(self.values.get(CONSTANTS.JOYSTICK.AXIS_LY)))
-                #self.XbeeCom.write(self.values.get(CONSTANTS.JOYSTICK.AXIS_LY))
-                data.append(int.from_bytes(self.values.get(CONSTANTS.JOYSTICK.AXIS_RY)))
-                #self.XbeeCom.write(self.values.get(CONSTANTS.JOYSTICK.AXIS_RY))
-            else:
-                # invert the controller so left joy stick is right and right joy stick is left
-                data.append(int.from_bytes(self.values.get(CONSTANTS.JOYSTICK.AXIS_RY)))
-                #self.XbeeCom.write(self.values.get(CONSTANTS.JOYSTICK.AXIS_RY))
-                data.append(int.from_bytes(self.values.get(CONSTANTS.JOYSTICK.AXIS_LY)))
-                #self.XbeeCom.write(self.values.get(CONSTANTS.JOYSTICK.AXIS_LY))
-
-            result = 0
-            # the first two bits
-            result += 64 * self.values.get(CONSTANTS.BUTTONS.A + 6)
-            # the 3rd and 4th bits
-            result += 16 * self.values.get(CONSTANTS.BUTTONS.B + 6)
-            # the 5th and 6th bits
-            result += 4 * self.values.get(CONSTANTS.BUTTONS.X + 6)
-            # the 7th and 8th bits
-            result += 1 * self.values.get(CONSTANTS.BUTTONS.Y + 6)
-
-            data.append(result)
-            #self.XbeeCom.write(result.to_bytes(1))
-            result = 0
-            # the first two bits
-            result += 64 * self.values.get(CONSTANTS.BUTTONS.LEFT_BUMPER + 6)
-            # the 3 and 4th bits
-            result += 16 * self.values.get(CONSTANTS.BUTTONS.RIGHT_BUMPER + 6)
-            # the 5 and 6th bits
-            result += 4 * self.values.get(CONSTANTS.TRIGGER.AXIS_LT)
-            # the 7 and 8th bits
-            result += 1 * self.values.get(CONSTANTS.TRIGGER.AXIS_RT)
-            # send all 4 buttons in one byte
-            data.append(result)
-            #self.XbeeCom.write(result.to_bytes(1))
-
-            # make sure all the byte are sent
-            #self.XbeeCom.flush()
-            # print(bytearray(data))
-            self.xbee_device.send_data(self.remote_xbee, bytearray(data))
+    def TransmitLoop(self):
+        from digi.xbee.exception import XBeeException
+        from serial import SerialException
+
+        # bind everything the loop uses to locals, none of it changes while running
+        tx_queue = self.txQueue
+        tx_ready = self.txReady
+        remote = self.remote_xbee
+        # async so the send doesn't wait on the transmit status from the radio
+        send = self.xbee_device.send_data_async
+
+        # when the link is down every send fails, so failures are only logged once a second
+        next_error_log = 0
+
+        while (True):
+            tx_ready.wait()
+            tx_ready.clear()
+
+            while (tx_queue):
+                try:
+                    send(remote, tx_queue.popleft())
+                except (XBeeException, SerialException) as e:
+                    now = time.monotonic_ns()
+                    if (now >= next_error_log):
+                        logger.warning("Failed to send to the rover: %s", e)
+                        next_error_log = now + 1000000000
+                except Exception:
+                    # nothing would send the controller values anymore, so stop the
+                    # base station instead of leaving it running without a link
+                    logger.exception("Transmit thread failed, quitting")
+                    self.quit = True
+                    return
+
+            if (self.txStopped):
+                return
+
+    """
+    Stop the transmit thread once it has sent everything already queued
+    """
+
+    def StopTransmit(self):
+        self.txStopped = True
+        self.txReady.set()
+        self.txThread.join(timeout=1.0)
+
+
+"""
+Read the controller and send its values to the rover until told to quit
+
+:param xbee - the xbee control to run
+"""
+
+def main(xbee: XbeeControl):
+    # bind everything the loop calls to locals so it isn't looked up every pass
+    get_events = pygame.event.get
+    send_command = xbee.SendCommand
+    update_info = xbee.UpdateInfo
+    refresh_display = xbee.display.Refresh_Display
+    sleep = time.sleep
+    now = time.monotonic_ns
+
+    # monotonic clock so wall clock adjustments can't stall or rush the loop
+    period = xbee.FREQUENCY
+    deadline = now() + period
+
+    while (not xbee.quit):
+        # sleep until the next send instead of spinning on the clock
+        remaining = deadline - now()
+        if (remaining > 0):
+            sleep(remaining / 1e9)
+
+        # read the controller right before sending so input that came in
+        # during the sleep goes out this tick instead of the next one
+        for event in coalesce_axis_events(get_events(EVENT_TYPES)):
+            send_command(event)
+            if (event.type == pygame.QUIT):
+                xbee.quit = True
+
+        update_info()
+        # only redraws if something shown changed, at most once per send
+        refresh_display()
+
+        # step from the last deadline so the send time doesn't add drift, but
+        # after a stall restart from now instead of running ticks back to back
+        deadline = max(deadline + period, now())
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--verbose', action='store_true', help="log debug messages")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
     # allow the controllers to always work
     os.environ['SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS'] = '1'
 
     # start pygame
     pygame.init()
 
-    # create the display
-    display = Display()
-
-    # create the xbee
-    xbee = XbeeControl()
+    # have SDL drop every event that isn't handled instead of queueing it
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(EVENT_TYPES)
 
-    timer = time.time_ns()
-    while (not xbee.quit):
-        while (timer + xbee.FREQUENCY > time.time_ns() and not xbee.quit):
-            for event in pygame.event.get():
-                xbee.SendCommand(event)
-                if (event.type == pygame.QUIT):
-                    xbee.quit = True
+    # create the display and the xbee
+    xbee = XbeeControl(Display())
 
-        xbee.UpdateInfo()
-        timer = time.time_ns()
+    main(xbee)
 
     if(xbee.XBEE_ENABLE):
+        xbee.StopTransmit()
         xbee.xbee_device.close()